@@ -3,12 +3,15 @@ from aws_cdk import (
     Duration,
     RemovalPolicy,
     CfnOutput,
+    BundlingOptions,
     aws_dynamodb as dynamodb,
     aws_lambda as lambda_,
     aws_events as events,
     aws_events_targets as targets,
     aws_apigateway as apigw,
     aws_s3 as s3,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
     aws_iam as iam,
     aws_secretsmanager as secretsmanager,
 )
@@ -22,13 +25,20 @@ class PipelineStack(Stack):
 
         # ─────────────────────────────────────────────
         # 1. DynamoDB Table
-        #    Partition key: date (String, e.g. "2025-06-10")
+        #    Partition key: pk (constant "MOVER")
+        #    Sort key:      date (String, e.g. "2025-06-10")
+        #    Keeping every record under one partition lets the query Lambda
+        #    read a date window with a single Query instead of N key lookups.
         # ─────────────────────────────────────────────
         table = dynamodb.Table(
             self,
             "MoversTable",
-            table_name="stocks-movers",
+            table_name="stocks-movers-v2",  # key schema change requires a new table
             partition_key=dynamodb.Attribute(
+                name="pk",
+                type=dynamodb.AttributeType.STRING,
+            ),
+            sort_key=dynamodb.Attribute(
                 name="date",
                 type=dynamodb.AttributeType.STRING,
             ),
@@ -47,20 +57,7 @@ class PipelineStack(Stack):
         )
 
         # ─────────────────────────────────────────────
-        # 3. Shared Lambda layer for the requests library
-        # ─────────────────────────────────────────────
-        requests_layer = lambda_.LayerVersion(
-            self,
-            "RequestsLayer",
-            code=lambda_.Code.from_asset(
-                os.path.join(os.path.dirname(__file__), "../../layers/requests")
-            ),
-            compatible_runtimes=[lambda_.Runtime.PYTHON_3_12],
-            description="requests library for Lambda",
-        )
-
-        # ─────────────────────────────────────────────
-        # 4. Ingestion Lambda
+        # 3. Ingestion Lambda
         #    Triggered by EventBridge daily cron
         # ─────────────────────────────────────────────
         ingestion_fn = lambda_.Function(
@@ -68,27 +65,27 @@ class PipelineStack(Stack):
             "IngestionFunction",
             function_name="stocks-ingestion",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,  # Graviton — cheaper per GB-second
             handler="handler.main",
             code=lambda_.Code.from_asset(
                 os.path.join(os.path.dirname(__file__), "../../lambdas/ingestion")
             ),
             timeout=Duration.seconds(60),
-            memory_size=128,
-            layers=[requests_layer],
+            memory_size=256,  # more memory = more vCPU for TLS/JSON work
             environment={
                 "TABLE_NAME": table.table_name,
                 "SECRET_NAME": "stocks/massive-api-key",
             },
         )
 
-        # Grant ingestion Lambda read/write on DynamoDB
-        table.grant_write_data(ingestion_fn)
+        # Grant ingestion Lambda PutItem only — it never updates, deletes or reads
+        table.grant(ingestion_fn, "dynamodb:PutItem")
 
         # Grant ingestion Lambda permission to read the secret
         api_key_secret.grant_read(ingestion_fn)
 
         # ─────────────────────────────────────────────
-        # 5. EventBridge Rule — fires daily at 9 PM UTC
+        # 4. EventBridge Rule — fires daily at 9 PM UTC
         #    (5 PM ET, after US market close at 4 PM ET)
         # ─────────────────────────────────────────────
         rule = events.Rule(
@@ -107,7 +104,7 @@ class PipelineStack(Stack):
         rule.add_target(targets.LambdaFunction(ingestion_fn))
 
         # ─────────────────────────────────────────────
-        # 6. Query Lambda
+        # 5. Query Lambda
         #    Separate function — serves GET /movers
         # ─────────────────────────────────────────────
         query_fn = lambda_.Function(
@@ -115,28 +112,88 @@ class PipelineStack(Stack):
             "QueryFunction",
             function_name="stocks-query",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            architecture=lambda_.Architecture.ARM_64,  # Graviton — cheaper per GB-second
             handler="handler.main",
+            # Dependencies (requirements.txt) are installed straight into the
+            # function zip — no layer hop on import. Bundling runs in the
+            # arm64 Lambda build image so orjson's compiled wheel matches.
             code=lambda_.Code.from_asset(
-                os.path.join(os.path.dirname(__file__), "../../lambdas/query")
+                os.path.join(os.path.dirname(__file__), "../../lambdas/query"),
+                bundling=BundlingOptions(
+                    image=lambda_.Runtime.PYTHON_3_12.bundling_image,
+                    platform="linux/arm64",
+                    command=[
+                        "bash", "-c",
+                        "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output",
+                    ],
+                ),
             ),
             timeout=Duration.seconds(10),
-            memory_size=128,
+            memory_size=512,  # ~4x the vCPU of 128 MB — faster boto3 import and init
+            snap_start=lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS,
             environment={
                 "TABLE_NAME": table.table_name,
             },
         )
 
-        # Grant query Lambda read-only on DynamoDB
-        table.grant_read_data(query_fn)
+        # SnapStart only applies to published versions, so API Gateway and the
+        # warmer invoke this alias rather than $LATEST
+        query_alias = lambda_.Alias(
+            self,
+            "QueryLive",
+            alias_name="live",
+            version=query_fn.current_version,
+        )
+
+        # Grant query Lambda Query only — its single access pattern
+        table.grant(query_fn, "dynamodb:Query")
+
+        # Keep the query Lambda warm during US business hours — 12:00–23:55 UTC
+        # on weekdays, the same days as DailyMarketCron — so first page loads
+        # don't pay a cold start. The handler short-circuits on the
+        # {"warmer": true} payload.
+        warmer_rule = events.Rule(
+            self,
+            "QueryWarmer",
+            rule_name="stocks-query-warmer",
+            description="Ping the query Lambda every 5 minutes to avoid cold starts",
+            schedule=events.Schedule.cron(
+                minute="0/5",
+                hour="12-23",
+                month="*",
+                week_day="MON-FRI",
+                year="*",
+            ),
+        )
+        warmer_rule.add_target(
+            targets.LambdaFunction(
+                query_alias,
+                event=events.RuleTargetInput.from_object({"warmer": True}),
+            )
+        )
 
         # ─────────────────────────────────────────────
-        # 7. API Gateway REST API
+        # 6. API Gateway REST API
         # ─────────────────────────────────────────────
         api = apigw.RestApi(
             self,
             "StocksApi",
             rest_api_name="stocks-api",
             description="Stocks pipeline REST API",
+            # Regional, not edge-optimized — our own CloudFront distribution is the
+            # edge, so an EDGE endpoint would add a second CloudFront hop
+            endpoint_types=[apigw.EndpointType.REGIONAL],
+            # Data changes once per weekday, so let the stage cache absorb
+            # repeat GET /movers traffic instead of invoking Lambda each time
+            deploy_options=apigw.StageOptions(
+                caching_enabled=True,
+                cache_cluster_enabled=True,
+                cache_cluster_size="0.5",
+                cache_ttl=Duration.minutes(15),
+                method_options={
+                    "/movers/GET": apigw.MethodDeploymentOptions(caching_enabled=True),
+                },
+            ),
             default_cors_preflight_options=apigw.CorsOptions(
                 allow_origins=apigw.Cors.ALL_ORIGINS,
                 allow_methods=["GET", "OPTIONS"],
@@ -148,31 +205,55 @@ class PipelineStack(Stack):
         movers_resource.add_method(
             "GET",
             apigw.LambdaIntegration(
-                query_fn,
+                query_alias,
                 proxy=True,
+                # Key the stage cache on If-None-Match so a cached 304 is never
+                # served to a client that sent no (or a different) ETag
+                cache_key_parameters=["method.request.header.If-None-Match"],
             ),
+            request_parameters={"method.request.header.If-None-Match": False},
         )
 
         # ─────────────────────────────────────────────
-        # 8. S3 Bucket — static website hosting
+        # 7. S3 Bucket — private frontend origin
+        #    Only CloudFront can read it (Origin Access Control)
         # ─────────────────────────────────────────────
         website_bucket = s3.Bucket(
             self,
             "WebsiteBucket",
             bucket_name=f"stocks-pipeline-frontend-{self.account}",
-            website_index_document="index.html",
-            website_error_document="index.html",
-            public_read_access=True,
-            block_public_access=s3.BlockPublicAccess(
-                block_public_acls=False,
-                block_public_policy=False,
-                ignore_public_acls=False,
-                restrict_public_buckets=False,
-            ),
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
             removal_policy=RemovalPolicy.DESTROY,
             auto_delete_objects=True,
         )
 
+        # ─────────────────────────────────────────────
+        # 8. CloudFront Distribution
+        #    Serves the frontend and /movers from one origin — HTTP/2,
+        #    gzip/brotli at the edge, and same-origin API calls (no CORS preflight)
+        # ─────────────────────────────────────────────
+        distribution = cloudfront.Distribution(
+            self,
+            "Dist",
+            comment="Stocks pipeline frontend + API",
+            default_root_object="index.html",
+            default_behavior=cloudfront.BehaviorOptions(
+                origin=origins.S3BucketOrigin.with_origin_access_control(website_bucket),
+                compress=True,
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            ),
+            additional_behaviors={
+                # RestApiOrigin maps /movers onto the API's /prod stage path;
+                # the edge honors the Cache-Control max-age the query Lambda sends
+                "/movers*": cloudfront.BehaviorOptions(
+                    origin=origins.RestApiOrigin(api),
+                    cache_policy=cloudfront.CachePolicy.CACHING_OPTIMIZED,
+                    compress=True,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                ),
+            },
+        )
+
         # ─────────────────────────────────────────────
         # 9. Outputs
         # ─────────────────────────────────────────────
@@ -180,14 +261,14 @@ class PipelineStack(Stack):
             self,
             "ApiUrl",
             value=api.url,
-            description="API Gateway base URL — use this in the frontend config",
+            description="Direct API Gateway endpoint (the frontend calls /movers via CloudFront)",
         )
 
         CfnOutput(
             self,
             "WebsiteUrl",
-            value=website_bucket.bucket_website_url,
-            description="S3 static website URL",
+            value=f"https://{distribution.distribution_domain_name}",
+            description="CloudFront URL for the frontend (also serves /movers)",
         )
 
         CfnOutput(
@@ -11,18 +11,22 @@ Responsibilities:
 Error handling:
   - Individual ticker failures are logged and skipped (pipeline continues)
   - If ALL tickers fail, logs critical error and exits without writing
-  - If market is closed (empty data), exits gracefully without writing
+  - If market is closed (weekend/known holiday, or empty data), exits gracefully without writing
+  - If a winner is already recorded for the date (re-run), the write is skipped
 """
 
 import os
 import json
 import logging
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timezone
 
 import boto3
-import requests
+import urllib3
 from botocore.exceptions import ClientError
+from urllib3.exceptions import HTTPError, NewConnectionError, TimeoutError as Urllib3TimeoutError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -34,43 +38,95 @@ SECRET_NAME = os.environ["SECRET_NAME"]
 
 MASSIVE_BASE_URL = "https://api.massive.com/v1"  # adjust if Massive endpoint differs
 REQUEST_TIMEOUT = 10   # seconds per API call
-RETRY_DELAY = 1.0      # seconds between ticker requests (rate limit safety)
+RETRY_DELAY = 1.0      # base backoff in seconds for retried requests
 MAX_RETRIES = 2        # retries per ticker on transient failures
+MAX_BACKOFF = 10.0     # cap on the exponential part of the retry wait (seconds)
+MOVER_PK = "MOVER"     # constant partition key — all records share it, sorted by date
+
+# NYSE/Nasdaq full-day closures — checked before any API work so holidays cost
+# nothing. Extend this list each year from the published NYSE holiday calendar.
+US_MARKET_HOLIDAYS = frozenset({
+    # 2025
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+    "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    # 2026
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19",
+    "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+    # 2027
+    "2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31", "2027-06-18",
+    "2027-07-05", "2027-09-06", "2027-11-25", "2027-12-24",
+})
+
+# Per-ticker URL templates built once at import — only the date varies per run
+TICKER_URL_TEMPLATES = {
+    t: f"{MASSIVE_BASE_URL}/aggs/ticker/{t}/range/1/day/{{d}}/{{d}}" for t in WATCHLIST
+}
 
 # ── AWS clients (module-level for Lambda container reuse) ─────────────────────
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
+dynamodb = boto3.client("dynamodb")  # low-level client — no resource-layer (de)serialization
 secrets_client = boto3.client("secretsmanager")
 
+# API key cached for the lifetime of the container (see get_api_key)
+_api_key_cache: str | None = None
+
+# ── HTTP pool (shared by the fetch threads) ───────────────────────────────────
+# urllib3 ships with botocore in the Lambda runtime, so no extra layer is needed.
+# Retries are disabled here — fetch_ticker runs its own retry loop.
+HTTP = urllib3.PoolManager(
+    maxsize=16,
+    timeout=urllib3.Timeout(connect=3, read=REQUEST_TIMEOUT),
+    retries=False,
+)
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+def is_market_closed(day: date) -> bool:
+    """True on weekends and known US market holidays."""
+    return day.weekday() >= 5 or day.isoformat() in US_MARKET_HOLIDAYS
+
+
 def get_api_key() -> str:
-    """Retrieve Massive API key from Secrets Manager."""
-    try:
-        response = secrets_client.get_secret_value(SecretId=SECRET_NAME)
-        return response["SecretString"].strip()
-    except ClientError as e:
-        logger.critical(f"Failed to retrieve API key from Secrets Manager: {e}")
-        raise
+    """
+    Retrieve Massive API key from Secrets Manager.
+    Cached after the first successful fetch so warm invocations skip the call.
+    Errors propagate — callers decide how loudly to report them.
+    """
+    global _api_key_cache
+    if _api_key_cache:
+        return _api_key_cache
 
+    response = secrets_client.get_secret_value(SecretId=SECRET_NAME)
+    _api_key_cache = response["SecretString"].strip()
+    return _api_key_cache
 
-def fetch_ticker(ticker: str, api_key: str, trade_date: str) -> dict | None:
+
+def _build_headers(api_key: str) -> dict:
+    """Build the Massive API request headers (shared by every ticker fetch)."""
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def fetch_ticker(ticker: str, headers: dict, trade_date: str, http: urllib3.PoolManager) -> dict | None:
     """
     Fetch daily Open/Close for a single ticker from the Massive API.
     Returns {"O": float, "C": float} or None if data unavailable.
 
     Retries up to MAX_RETRIES times on transient HTTP errors.
     """
-    url = f"{MASSIVE_BASE_URL}/aggs/ticker/{ticker}/range/1/day/{trade_date}/{trade_date}"
-    headers = {"Authorization": f"Bearer {api_key}"}
+    url = TICKER_URL_TEMPLATES[ticker].format(d=trade_date)
 
     for attempt in range(1, MAX_RETRIES + 2):  # +2 because range is exclusive
+        # Capped exponential backoff plus jitter, shared by every retry branch —
+        # keeps the concurrent fetch threads from retrying in lockstep.
+        # No wait after the final attempt: there is nothing left to retry.
+        will_retry = attempt <= MAX_RETRIES
+        wait = min(RETRY_DELAY * (2 ** (attempt - 1)), MAX_BACKOFF) + random.random() * RETRY_DELAY
+
         try:
-            resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            resp = http.request("GET", url, headers=headers)
 
-            if resp.status_code == 200:
-                data = resp.json()
+            if resp.status == 200:
+                data = json.loads(resp.data)
                 results = data.get("results", [])
 
                 if not results:
@@ -91,27 +147,35 @@ def fetch_ticker(ticker: str, api_key: str, trade_date: str) -> dict | None:
 
                 return {"O": float(open_price), "C": float(close_price)}
 
-            elif resp.status_code == 429:
-                wait = RETRY_DELAY * (2 ** (attempt - 1))  # exponential backoff
-                logger.warning(f"{ticker}: Rate limited (429). Waiting {wait}s before retry {attempt}/{MAX_RETRIES}")
-                time.sleep(wait)
+            elif resp.status == 429:
+                if will_retry:
+                    logger.warning(f"{ticker}: Rate limited (429). Waiting {wait:.2f}s before retry {attempt}/{MAX_RETRIES}")
+                    time.sleep(wait)
+                else:
+                    logger.warning(f"{ticker}: Rate limited (429) on final attempt {attempt}")
                 continue
 
-            elif resp.status_code in (500, 502, 503, 504):
-                logger.warning(f"{ticker}: Server error {resp.status_code} on attempt {attempt}")
-                time.sleep(RETRY_DELAY)
+            elif resp.status in (500, 502, 503, 504):
+                logger.warning(f"{ticker}: Server error {resp.status} on attempt {attempt}")
+                if will_retry:
+                    time.sleep(wait)
                 continue
 
             else:
-                logger.error(f"{ticker}: Unexpected status {resp.status_code}: {resp.text[:200]}")
+                logger.error(f"{ticker}: Unexpected status {resp.status}: {resp.data[:200].decode(errors='replace')}")
                 return None
 
-        except requests.exceptions.Timeout:
+        except NewConnectionError as e:  # subclasses the timeout error — catch first
+            logger.error(f"{ticker}: Connection error: {e}")
+            return None
+
+        except Urllib3TimeoutError:
             logger.warning(f"{ticker}: Request timed out on attempt {attempt}")
-            time.sleep(RETRY_DELAY)
+            if will_retry:
+                time.sleep(wait)
             continue
 
-        except requests.exceptions.ConnectionError as e:
+        except HTTPError as e:
             logger.error(f"{ticker}: Connection error: {e}")
             return None
 
@@ -128,84 +192,142 @@ def calculate_pct_change(open_price: float, close_price: float) -> float:
     return ((close_price - open_price) / open_price) * 100
 
 
-def write_winner(trade_date: str, ticker: str, pct_change: float, closing_price: float) -> None:
-    """Write the top mover record to DynamoDB."""
+def write_winner(trade_date: str, ticker: str, pct_change: float, closing_price: float) -> bool:
+    """
+    Write the top mover record to DynamoDB.
+    Returns True if written, False if a record for trade_date already existed.
+    """
     try:
-        table.put_item(
+        dynamodb.put_item(
+            TableName=TABLE_NAME,
             Item={
-                "date": trade_date,
-                "ticker": ticker,
-                "percent_change": str(round(pct_change, 4)),  # DynamoDB Decimal-safe
-                "closing_price": str(round(closing_price, 2)),
-                "ingested_at": datetime.now(timezone.utc).isoformat(),
-            }
+                "pk": {"S": MOVER_PK},
+                "date": {"S": trade_date},
+                "ticker": {"S": ticker},
+                "percent_change": {"N": str(round(pct_change, 4))},  # native Number — filterable server-side
+                "closing_price": {"N": str(round(closing_price, 2))},
+                "ingested_at": {"S": datetime.now(timezone.utc).isoformat()},
+            },
+            # First write of the day wins — a re-run for the same date is rejected
+            ConditionExpression="attribute_not_exists(#d)",
+            ExpressionAttributeNames={"#d": "date"},  # 'date' is a reserved word
         )
         logger.info(f"Wrote winner to DynamoDB: {ticker} {pct_change:+.2f}% on {trade_date}")
+        return True
     except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            logger.info(f"Winner for {trade_date} already recorded — skipping duplicate write")
+            return False
         logger.critical(f"DynamoDB write failed: {e}")
         raise
 
 
+# ── Cold-start init ───────────────────────────────────────────────────────────
+# Prime the API key cache so the first invocation is warm too (skipped when the
+# market is closed — main() won't need the key). A failure here is not fatal:
+# main() fetches again and reports it as critical, so only warn here.
+if not is_market_closed(date.today()):
+    try:
+        get_api_key()
+    except Exception as e:
+        logger.warning(f"Could not prime API key cache at init, will retry in handler: {e}")
+
+
 # ── Handler ───────────────────────────────────────────────────────────────────
 
 def main(event, context):
     """Lambda entry point."""
-    trade_date = date.today().isoformat()  # e.g. "2025-06-10"
+    today = date.today()
+    trade_date = today.isoformat()  # e.g. "2025-06-10"
+
+    # Guard: weekend or market holiday — skip before any Secrets Manager/API calls
+    if is_market_closed(today):
+        logger.info(f"Market closed on {trade_date} — skipping ingestion")
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"message": "Market closed — weekend or holiday", "date": trade_date}),
+        }
+
     logger.info(f"Starting ingestion for {trade_date}")
 
     # Retrieve API key once
     try:
         api_key = get_api_key()
-    except Exception:
+    except Exception as e:
+        logger.critical(f"Failed to retrieve API key from Secrets Manager: {e}")
         return {"statusCode": 500, "body": "Failed to retrieve API key"}
 
-    # Collect results for all tickers
-    results = []
+    headers = _build_headers(api_key)
+
+    # Fetch all tickers concurrently (the work is network-bound and each ticker
+    # is independent), tracking the winner — highest absolute % change — as
+    # results arrive rather than collecting them for a separate max() pass.
+    # Ties go to the earlier WATCHLIST ticker, independent of completion order.
+    winner = None
+    winner_rank = None
+    tickers_processed = 0
     failed_tickers = []
 
-    for ticker in WATCHLIST:
-        data = fetch_ticker(ticker, api_key, trade_date)
-        time.sleep(RETRY_DELAY)  # be polite to the API between tickers
+    with ThreadPoolExecutor(max_workers=len(WATCHLIST)) as executor:
+        futures = {
+            executor.submit(fetch_ticker, ticker, headers, trade_date, HTTP): ticker
+            for ticker in WATCHLIST
+        }
 
-        if data is None:
-            failed_tickers.append(ticker)
-            continue
+        for future in as_completed(futures):
+            ticker = futures[future]
+            data = future.result()
+
+            if data is None:
+                failed_tickers.append(ticker)
+                continue
 
-        pct = calculate_pct_change(data["O"], data["C"])
-        results.append({
-            "ticker": ticker,
-            "pct_change": pct,
-            "closing_price": data["C"],
-        })
-        logger.info(f"{ticker}: open={data['O']:.2f} close={data['C']:.2f} change={pct:+.2f}%")
+            pct = calculate_pct_change(data["O"], data["C"])
+            tickers_processed += 1
+            logger.info(f"{ticker}: open={data['O']:.2f} close={data['C']:.2f} change={pct:+.2f}%")
+
+            rank = (abs(pct), -WATCHLIST.index(ticker))
+            if winner is None or rank > winner_rank:
+                winner = {
+                    "ticker": ticker,
+                    "pct_change": pct,
+                    "closing_price": data["C"],
+                }
+                winner_rank = rank
 
     # Log partial failures
     if failed_tickers:
         logger.warning(f"Failed to fetch data for: {failed_tickers}")
 
     # Guard: no data at all (market closed, holiday, total API failure)
-    if not results:
+    if winner is None:
         logger.warning("No results collected — market likely closed or API unavailable. Skipping write.")
         return {
             "statusCode": 200,
             "body": json.dumps({"message": "No data — market closed or API unavailable", "date": trade_date}),
         }
 
-    # Find the winner: highest absolute % change
-    winner = max(results, key=lambda x: abs(x["pct_change"]))
     logger.info(
         f"Winner: {winner['ticker']} with {winner['pct_change']:+.2f}% change "
         f"(close: ${winner['closing_price']:.2f})"
     )
 
     # Write to DynamoDB
-    write_winner(
+    written = write_winner(
         trade_date=trade_date,
         ticker=winner["ticker"],
         pct_change=winner["pct_change"],
         closing_price=winner["closing_price"],
     )
 
+    # Guard: re-run for a date that already has a winner — nothing was stored,
+    # and the stored record may name a different ticker, so don't report one
+    if not written:
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"message": "Winner already recorded — duplicate write skipped", "date": trade_date}),
+        }
+
     return {
         "statusCode": 200,
         "body": json.dumps({
@@ -213,7 +335,7 @@ def main(event, context):
             "winner": winner["ticker"],
             "percent_change": round(winner["pct_change"], 4),
             "closing_price": round(winner["closing_price"], 2),
-            "tickers_processed": len(results),
+            "tickers_processed": tickers_processed,
             "tickers_failed": failed_tickers,
         }),
     }
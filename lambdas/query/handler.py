@@ -3,19 +3,20 @@ Query Lambda — stocks-query
 Triggered by API Gateway: GET /movers
 
 Responsibilities:
-  - Scan DynamoDB for records from the last 7 days
+  - Query DynamoDB for records from the last 7 days
   - Return sorted results (most recent first) as JSON
   - Attach CORS headers so the S3 frontend can call this endpoint
+  - Send an ETag and answer matching If-None-Match requests with 304 Not Modified
+  - Answer EventBridge warm-up pings ({"warmer": true}) without touching DynamoDB
 """
 
 import os
 import json
 import logging
 from datetime import date, timedelta
-from decimal import Decimal
 
 import boto3
-from boto3.dynamodb.conditions import Key, Attr
+import orjson
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger()
@@ -24,10 +25,11 @@ logger.setLevel(logging.INFO)
 # ── Config ────────────────────────────────────────────────────────────────────
 TABLE_NAME = os.environ["TABLE_NAME"]
 DAYS_TO_RETURN = 7
+CACHE_MAX_AGE = 900  # seconds — matches the API Gateway stage cache TTL
+MOVER_PK = "MOVER"  # constant partition key written by the ingestion Lambda
 
 # ── AWS client ────────────────────────────────────────────────────────────────
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
+dynamodb = boto3.client("dynamodb")  # low-level client — items are unmarshalled in format_item
 
 # ── CORS headers (required for S3-hosted frontend) ────────────────────────────
 CORS_HEADERS = {
@@ -40,60 +42,68 @@ CORS_HEADERS = {
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-class DecimalEncoder(json.JSONEncoder):
-    """Handle Decimal types returned by DynamoDB."""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
-
-
-def get_date_range(days: int) -> list[str]:
-    """Return a list of ISO date strings for the last N days."""
-    today = date.today()
-    return [(today - timedelta(days=i)).isoformat() for i in range(days)]
-
-
-def query_movers(date_range: list[str]) -> list[dict]:
+def query_movers(start: str, end: str) -> list[dict]:
     """
-    Fetch mover records for the given dates.
-    Uses batch_get_item for efficiency — avoids a full table scan.
+    Fetch mover records dated between start and end (inclusive ISO dates),
+    most recent first.
+    Issues a single Query over the date sort key — avoids a full table scan
+    and one key lookup per day.
     """
-    if not date_range:
-        return []
-
     try:
-        response = dynamodb.batch_get_item(
-            RequestItems={
-                TABLE_NAME: {
-                    "Keys": [{"date": d} for d in date_range],
-                    "ProjectionExpression": "#dt, ticker, percent_change, closing_price",
-                    "ExpressionAttributeNames": {"#dt": "date"},  # 'date' is a reserved word
-                }
-            }
+        response = dynamodb.query(
+            TableName=TABLE_NAME,
+            KeyConditionExpression="pk = :pk AND #dt BETWEEN :start AND :end",
+            ExpressionAttributeValues={
+                ":pk": {"S": MOVER_PK},
+                ":start": {"S": start},
+                ":end": {"S": end},
+            },
+            ScanIndexForward=False,  # newest date first
+            ProjectionExpression="#dt, ticker, percent_change, closing_price",
+            ExpressionAttributeNames={"#dt": "date"},  # 'date' is a reserved word
         )
-
-        items = response.get("Responses", {}).get(TABLE_NAME, [])
-
-        # Handle unprocessed keys (DynamoDB throughput limit — rare but possible)
-        unprocessed = response.get("UnprocessedKeys", {})
-        if unprocessed:
-            logger.warning(f"UnprocessedKeys returned — consider retrying: {list(unprocessed.keys())}")
-
-        return items
+        return response.get("Items", [])
 
     except ClientError as e:
         logger.error(f"DynamoDB query failed: {e}")
         raise
 
 
+def get_header(event: dict, name: str) -> str | None:
+    """Case-insensitive request header lookup (API Gateway passes them as sent)."""
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETag (RFC 9110).
+    The header may be "*" or a comma-separated list, and tags weakened by a
+    compressing proxy (W/"...") still match.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        if tag.strip().removeprefix("W/") == opaque:
+            return True
+    return False
+
+
 def format_item(item: dict) -> dict:
-    """Normalize a DynamoDB item for the API response."""
+    """Unmarshal a low-level DynamoDB item into the API response shape."""
     return {
-        "date": item["date"],
-        "ticker": item["ticker"],
-        "percent_change": round(float(item.get("percent_change", 0)), 2),
-        "closing_price": round(float(item.get("closing_price", 0)), 2),
+        "date": item["date"]["S"],
+        "ticker": item["ticker"]["S"],
+        "percent_change": round(float(item.get("percent_change", {}).get("N", 0)), 2),
+        "closing_price": round(float(item.get("closing_price", {}).get("N", 0)), 2),
     }
 
 
@@ -101,6 +111,10 @@ def format_item(item: dict) -> dict:
 
 def main(event, context):
     """Lambda entry point for GET /movers."""
+    # Scheduled warm-up ping from EventBridge — skip all real work
+    if event.get("warmer"):
+        return {"statusCode": 200, "body": "warm"}
+
     logger.info(f"Query request received: {json.dumps(event)}")
 
     # Handle preflight OPTIONS request
@@ -108,26 +122,33 @@ def main(event, context):
         return {"statusCode": 200, "headers": CORS_HEADERS, "body": ""}
 
     try:
-        date_range = get_date_range(DAYS_TO_RETURN)
-        logger.info(f"Querying for dates: {date_range}")
+        today = date.today()
+        start = (today - timedelta(days=DAYS_TO_RETURN - 1)).isoformat()
+        end = today.isoformat()
+        logger.info(f"Querying for dates: {start} to {end}")
 
-        items = query_movers(date_range)
+        items = query_movers(start, end)
         logger.info(f"Found {len(items)} records")
 
-        # Format and sort by date descending (most recent first)
-        movers = sorted(
-            [format_item(item) for item in items],
-            key=lambda x: x["date"],
-            reverse=True,
-        )
+        headers = {**CORS_HEADERS, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+
+        # The result only changes when a new day is written or the window slides,
+        # so the window start plus the newest date identifies it. Items arrive
+        # newest first, so the latest date is items[0].
+        if items:
+            headers["ETag"] = f'"{start}_{items[0]["date"]["S"]}"'
+
+            # Client already has this version — skip formatting and the body
+            if etag_matches(get_header(event, "If-None-Match"), headers["ETag"]):
+                return {"statusCode": 304, "headers": headers, "body": ""}
+
+        # Items arrive sorted by date descending (most recent first)
+        movers = [format_item(item) for item in items]
 
         return {
             "statusCode": 200,
-            "headers": CORS_HEADERS,
-            "body": json.dumps(
-                {"movers": movers, "count": len(movers)},
-                cls=DecimalEncoder,
-            ),
+            "headers": headers,
+            "body": orjson.dumps({"movers": movers, "count": len(movers)}).decode(),
         }
 
     except Exception as e:
@@ -0,0 +1,70 @@
+"""
+Tests for the query Lambda's conditional-request helpers.
+Run from the project root: python -m pytest -q
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+os.environ.setdefault("TABLE_NAME", "stocks-movers-test")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+# Both Lambdas ship a module named handler.py, so load this one by path
+_spec = importlib.util.spec_from_file_location(
+    "query_handler",
+    os.path.join(os.path.dirname(__file__), "../lambdas/query/handler.py"),
+)
+handler = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(handler)
+
+ETAG = '"2026-10-08_2026-10-13"'
+
+
+@pytest.mark.parametrize("header_name", ["If-None-Match", "if-none-match", "IF-NONE-MATCH"])
+def test_get_header_is_case_insensitive(header_name):
+    event = {"headers": {header_name: ETAG}}
+    assert handler.get_header(event, "If-None-Match") == ETAG
+
+
+def test_get_header_handles_missing_headers():
+    assert handler.get_header({"headers": None}, "If-None-Match") is None
+    assert handler.get_header({}, "If-None-Match") is None
+
+
+@pytest.mark.parametrize("if_none_match", [
+    ETAG,
+    f"W/{ETAG}",
+    f'"stale", {ETAG}',
+    f'W/"stale",W/{ETAG}',
+    "*",
+    " * ",
+])
+def test_etag_matches(if_none_match):
+    assert handler.etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"stale"', 'W/"stale", "older"'])
+def test_etag_does_not_match(if_none_match):
+    assert not handler.etag_matches(if_none_match, ETAG)
+
+
+def test_weak_multi_tag_header_returns_304(monkeypatch):
+    items = [{
+        "date": {"S": "2026-10-13"},
+        "ticker": {"S": "NVDA"},
+        "percent_change": {"N": "3.12"},
+        "closing_price": {"N": "120.5"},
+    }]
+    monkeypatch.setattr(handler, "query_movers", lambda start, end: items)
+
+    first = handler.main({"httpMethod": "GET", "headers": None}, None)
+    assert first["statusCode"] == 200
+    etag = first["headers"]["ETag"]
+
+    event = {"httpMethod": "GET", "headers": {"if-none-match": f'W/"stale", W/{etag}'}}
+    second = handler.main(event, None)
+    assert second["statusCode"] == 304
+    assert second["body"] == ""
+    assert second["headers"]["ETag"] == etag